@@ -0,0 +1,259 @@
+import math
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+# One model answer, or one streamed chunk of it. ``usage`` holds running
+# totals, so for a stream the last chunk's usage is the whole call's usage.
+Usage = namedtuple("Usage", ["prompt_tokens", "response_tokens"])
+Generation = namedtuple("Generation", ["text", "blocked", "usage"])
+
+
+class UpstreamError(Exception):
+    """A transient upstream failure (overload, 5xx) that is worth retrying."""
+
+
+class ModelBackend:
+    """Interface behind generate_response: a blocking and a streaming call.
+
+    ``prompt`` is either a string or a list of Gemini-style contents
+    (``{"role": ..., "parts": [...]}``) for multi-turn conversations.
+    """
+
+    name = "base"
+
+    def generate(self, prompt, timeout=None):
+        raise NotImplementedError
+
+    def stream(self, prompt, timeout=None):
+        raise NotImplementedError
+
+    def warm(self):
+        """Open upstream connections before taking traffic; no-op by default."""
+
+
+# ===== GEMINI =====
+GENERATION_CONFIG = {
+    "temperature": 0.9,
+    "top_p": 1,
+    "top_k": 1,
+    "max_output_tokens": 2048,
+}
+
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+]
+
+
+def _gemini_usage(usage_metadata):
+    if usage_metadata is None:
+        return None
+    return Usage(
+        getattr(usage_metadata, "prompt_token_count", 0) or 0,
+        getattr(usage_metadata, "candidates_token_count", 0) or 0,
+    )
+
+
+class GeminiBackend(ModelBackend):
+    name = "gemini"
+
+    def __init__(self, api_key, model_name, system_instruction=None):
+        import google.generativeai as genai
+        from google.api_core import exceptions as api_exceptions
+
+        # SDK errors are translated here so the retry layer never imports the SDK
+        self._blocked_errors = (genai.types.BlockedPromptException,)
+        self._timeout_errors = (api_exceptions.DeadlineExceeded,)
+        self._upstream_errors = (
+            api_exceptions.ServiceUnavailable,
+            api_exceptions.ResourceExhausted,
+            api_exceptions.InternalServerError,
+        )
+        genai.configure(api_key=api_key)
+        # The system instruction is bound to the model once instead of being
+        # pasted into every prompt
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=GENERATION_CONFIG,
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=system_instruction
+        )
+
+    def warm(self):
+        # count_tokens is free and goes through the same client as generate_content
+        self.model.count_tokens("ping")
+
+    def _request_options(self, timeout):
+        return {"timeout": timeout} if timeout else None
+
+    @contextmanager
+    def _translate_errors(self):
+        try:
+            yield
+        except self._timeout_errors as e:
+            raise TimeoutError(str(e)) from e
+        except self._upstream_errors as e:
+            raise UpstreamError(str(e)) from e
+
+    def _text(self, response):
+        # A blocked prompt has no candidates, and .parts/.text raise ValueError
+        # instead of returning empty
+        try:
+            return response.text if response.parts else None
+        except ValueError:
+            return None
+
+    def generate(self, prompt, timeout=None):
+        try:
+            with self._translate_errors():
+                response = self.model.generate_content(
+                    prompt,
+                    request_options=self._request_options(timeout)
+                )
+        except self._blocked_errors:
+            return Generation("", True, None)
+        usage = _gemini_usage(getattr(response, "usage_metadata", None))
+        text = self._text(response)
+        if text is None:
+            return Generation("", True, usage)
+        return Generation(text, False, usage)
+
+    def stream(self, prompt, timeout=None):
+        try:
+            with self._translate_errors():
+                response = self.model.generate_content(
+                    prompt,
+                    stream=True,
+                    request_options=self._request_options(timeout)
+                )
+                # A blocked prompt raises BlockedPromptException from the first next()
+                for chunk in response:
+                    usage = _gemini_usage(getattr(chunk, "usage_metadata", None))
+                    text = self._text(chunk)
+                    if text is None:
+                        yield Generation("", True, usage)
+                    else:
+                        yield Generation(text, False, usage)
+        except self._blocked_errors:
+            yield Generation("", True, None)
+
+
+# ===== LOCAL STAND-IN =====
+FAKE_ANSWER = (
+    "Here is some general information about your question:\n"
+    "* Rest and drink plenty of fluids\n"
+    "* See a doctor if symptoms persist or get worse\n"
+    "This is not medical advice; please consult a healthcare professional."
+)
+
+
+def _prompt_tokens(prompt):
+    if isinstance(prompt, str):
+        return len(prompt.split())
+    return sum(len(str(part).split()) for content in prompt for part in content["parts"])
+
+
+class FakeBackend(ModelBackend):
+    """Deterministic offline backend for CI, load tests and perf work.
+
+    Latency is log-normal around ``latency_ms`` (``latency_sigma`` = 0 makes
+    it constant); streams emit ``chunks`` pieces spaced ``chunk_ms`` apart
+    after the first-chunk latency. ``error_rate`` and ``block_rate`` inject
+    upstream failures and safety blocks. All randomness comes from ``seed``.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms=800, latency_sigma=0.5, chunk_ms=50, chunks=8,
+                 error_rate=0.0, block_rate=0.0, response_tokens=60, seed=0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.chunk_ms = chunk_ms
+        self.chunks = max(1, chunks)
+        self.error_rate = error_rate
+        self.block_rate = block_rate
+        self.response_tokens = response_tokens
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self):
+        with self._lock:
+            latency = self.latency_ms / 1000 * math.exp(self._random.gauss(0, self.latency_sigma))
+            outcome = self._random.random()
+        if outcome < self.error_rate:
+            return latency, "error"
+        if outcome < self.error_rate + self.block_rate:
+            return latency, "blocked"
+        return latency, "ok"
+
+    def _sleep(self, seconds, timeout):
+        # A slow consumer can use up the whole stream budget between chunks
+        if timeout is not None and timeout <= 0:
+            raise TimeoutError("Fake backend call timed out")
+        if timeout is not None and seconds > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("Fake backend call timed out")
+        time.sleep(seconds)
+
+    def _answer(self):
+        words = FAKE_ANSWER.split(" ")
+        # Pad or trim to the configured token count (one word ~ one token here)
+        while len(words) < self.response_tokens:
+            words += FAKE_ANSWER.split(" ")
+        return " ".join(words[:self.response_tokens])
+
+    def generate(self, prompt, timeout=None):
+        latency, outcome = self._draw()
+        self._sleep(latency, timeout)
+        usage = Usage(_prompt_tokens(prompt), 0 if outcome == "blocked" else self.response_tokens)
+        if outcome == "error":
+            raise UpstreamError("Fake backend upstream error")
+        if outcome == "blocked":
+            return Generation("", True, usage)
+        return Generation(self._answer(), False, usage)
+
+    def stream(self, prompt, timeout=None):
+        started = time.monotonic()
+        latency, outcome = self._draw()
+        self._sleep(latency, timeout)
+        prompt_tokens = _prompt_tokens(prompt)
+        if outcome == "error":
+            raise UpstreamError("Fake backend upstream error")
+        if outcome == "blocked":
+            yield Generation("", True, Usage(prompt_tokens, 0))
+            return
+
+        answer = self._answer()
+        size = math.ceil(len(answer) / self.chunks)
+        pieces = [answer[i:i + size] for i in range(0, len(answer), size)]
+        for i, piece in enumerate(pieces):
+            if i:
+                remaining = None if timeout is None else timeout - (time.monotonic() - started)
+                self._sleep(self.chunk_ms / 1000, remaining)
+            tokens = round(self.response_tokens * (i + 1) / len(pieces))
+            yield Generation(piece, False, Usage(prompt_tokens, tokens))
+
+
+def backend_from_env(api_key, model_name, system_instruction=None):
+    """MODEL_BACKEND=gemini (default) or fake; FAKE_* variables tune the fake."""
+    kind = os.getenv("MODEL_BACKEND", "gemini")
+    if kind == "fake":
+        return FakeBackend(
+            latency_ms=float(os.getenv("FAKE_LATENCY_MS", "800")),
+            latency_sigma=float(os.getenv("FAKE_LATENCY_SIGMA", "0.5")),
+            chunk_ms=float(os.getenv("FAKE_CHUNK_MS", "50")),
+            chunks=int(os.getenv("FAKE_CHUNKS", "8")),
+            error_rate=float(os.getenv("FAKE_ERROR_RATE", "0")),
+            block_rate=float(os.getenv("FAKE_BLOCK_RATE", "0")),
+            response_tokens=int(os.getenv("FAKE_RESPONSE_TOKENS", "60")),
+            seed=int(os.getenv("FAKE_SEED", "0")),
+        )
+    if kind == "gemini":
+        return GeminiBackend(api_key, model_name, system_instruction)
+    raise ValueError(f"Unknown MODEL_BACKEND: {kind}")
@@ -0,0 +1,147 @@
+"""Load-test benchmark for the chat API.
+
+Against a running server (any backend):
+
+    python bench_chat.py --url http://localhost:5000 --concurrency 16 --requests 500
+
+Fully offline, in-process with the fake backend (no server, no API key):
+
+    MODEL_BACKEND=fake FAKE_LATENCY_MS=300 python bench_chat.py --in-process
+
+Reports throughput and latency percentiles; with --stream it also reports
+time to first event on /chat/stream.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+QUESTIONS = [
+    "what is malaria",
+    "side effects of paracetamol",
+    "how do I lower my blood pressure",
+    "is it safe to take ibuprofen with coffee",
+    "what are the symptoms of typhoid",
+    "how much sleep does a teenager need",
+    "I want to book appointment",
+    "where is my order",
+    "do you have amoxicillin",
+    "what causes migraines",
+]
+
+
+# ===== CLIENTS =====
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def post(self, path, payload):
+        """Return (status, seconds to first byte, seconds to full body)."""
+        body = json.dumps(payload).encode()
+        req = urllib.request.Request(
+            self.base_url + path, data=body, headers={"Content-Type": "application/json"}
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=120) as response:
+                response.read(1)
+                first = time.perf_counter() - start
+                response.read()
+                return response.status, first, time.perf_counter() - start
+        except urllib.error.HTTPError as e:
+            elapsed = time.perf_counter() - start
+            return e.code, elapsed, elapsed
+        except OSError:
+            elapsed = time.perf_counter() - start
+            return 0, elapsed, elapsed
+
+
+class InProcessClient:
+    """Drives the Flask app directly; the fake backend keeps it offline."""
+
+    def __init__(self):
+        os.environ.setdefault("MODEL_BACKEND", "fake")
+        import training
+
+        self.app = training.create_app()
+
+    def post(self, path, payload):
+        client = self.app.test_client()
+        start = time.perf_counter()
+        response = client.post(path, json=payload, buffered=False)
+        first = None
+        for _ in response.response:
+            if first is None:
+                first = time.perf_counter() - start
+        elapsed = time.perf_counter() - start
+        response.close()
+        return response.status_code, first if first is not None else elapsed, elapsed
+
+
+# ===== REPORTING =====
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(label, values):
+    ms = [v * 1000 for v in values]
+    print(
+        f"{label:<14} p50 {percentile(ms, 50):8.1f} ms   p90 {percentile(ms, 90):8.1f} ms   "
+        f"p99 {percentile(ms, 99):8.1f} ms   max {max(ms, default=0):8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the chat API.")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--in-process", action="store_true", help="use the Flask test client")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--stream", action="store_true", help="hit /chat/stream instead of /chat")
+    parser.add_argument("--no-cache", action="store_true", help="send cache: false")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    client = InProcessClient() if args.in_process else HttpClient(args.url)
+    path = "/chat/stream" if args.stream else "/chat"
+    rng = random.Random(args.seed)
+    payloads = [{"message": rng.choice(QUESTIONS)} for _ in range(args.requests)]
+    if args.no_cache:
+        for payload in payloads:
+            payload["cache"] = False
+
+    statuses = Counter()
+    first_byte, total = [], []
+    lock = threading.Lock()
+
+    def run(payload):
+        status, first, elapsed = client.post(path, payload)
+        with lock:
+            statuses[status] += 1
+            first_byte.append(first)
+            total.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run, payloads))
+    wall = time.perf_counter() - start
+
+    print(f"{args.requests} requests to {path}, concurrency {args.concurrency}, {wall:.2f}s")
+    print(f"throughput     {args.requests / wall:.1f} req/s")
+    print("status         " + ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items())))
+    report("first byte", first_byte)
+    report("total", total)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Micro-benchmark: compiled intent matcher vs. the old linear keyword scan.
+
+    python bench_intents.py [--questions 2000]
+
+Per-call cost of the linear scan grows with the number of keywords; the
+Aho-Corasick matcher should stay roughly flat.
+"""
+import argparse
+import random
+import string
+import time
+
+from intents import IntentRegistry
+
+SAMPLE_QUESTIONS = [
+    "what is malaria",
+    "side effects of paracetamol",
+    "I would like to book appointment with a cardiologist next week",
+    "can you tell me where is my order, it has been three days",
+    "how much water should I drink every day to stay healthy",
+    "I need to cancel my appointment for tomorrow morning",
+]
+
+
+def random_keyword(rng):
+    words = rng.randint(1, 3)
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+        for _ in range(words)
+    )
+
+
+def build_intents(keyword_count, rng):
+    intents = [
+        {"name": f"intent_{i}", "priority": i, "keywords": []}
+        for i in range(max(1, keyword_count // 50))
+    ]
+    for _ in range(keyword_count):
+        rng.choice(intents)["keywords"].append(random_keyword(rng))
+    return intents
+
+
+def linear_detect(intents, question):
+    question_lower = question.lower().strip()
+    for intent in intents:
+        if any(keyword in question_lower for keyword in intent["keywords"]):
+            return intent["name"]
+    return None
+
+
+def time_per_call(fn, questions):
+    start = time.perf_counter()
+    for question in questions:
+        fn(question)
+    return (time.perf_counter() - start) / len(questions) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    questions = [rng.choice(SAMPLE_QUESTIONS) for _ in range(args.questions)]
+
+    print(f"{'keywords':>9} {'compile ms':>11} {'matcher us/call':>16} {'linear us/call':>15}")
+    for keyword_count in (10, 100, 1000, 5000, 10000):
+        intents = build_intents(keyword_count, rng)
+        start = time.perf_counter()
+        registry = IntentRegistry(intents)
+        compile_ms = (time.perf_counter() - start) * 1000
+        matcher_us = time_per_call(registry.detect, questions)
+        linear_us = time_per_call(lambda q: linear_detect(intents, q), questions)
+        print(f"{keyword_count:>9} {compile_ms:>11.1f} {matcher_us:>16.2f} {linear_us:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+# Endpoint tests run against the offline fake backend; set before training is imported
+os.environ.setdefault("MODEL_BACKEND", "fake")
+os.environ.setdefault("FAKE_LATENCY_MS", "5")
+os.environ.setdefault("FAKE_LATENCY_SIGMA", "0")
+os.environ.setdefault("FAKE_CHUNK_MS", "0")
+os.environ.setdefault("PREWARM", "off")
+
+
+@pytest.fixture
+def training():
+    import training as module
+
+    module.response_cache.clear()
+    return module
+
+
+@pytest.fixture
+def client(training):
+    return training.create_app().test_client()
@@ -0,0 +1,212 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger("chatbot")
+
+USER = "user"
+MODEL = "model"
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text; good enough for budgeting
+    return len(text) // 4 + 1
+
+
+# ===== PROMPT ASSEMBLY =====
+def build_contents(history, question, token_budget):
+    """Turn stored history plus the new question into Gemini ``contents``.
+
+    The newest turns are kept verbatim while they fit in ``token_budget``;
+    older user questions are folded into a one-line summary and their
+    answers dropped.
+    """
+    budget = token_budget - estimate_tokens(question)
+    kept = []
+    for role, text in reversed(history):
+        cost = estimate_tokens(text)
+        if cost > budget:
+            break
+        budget -= cost
+        kept.append((role, text))
+    kept.reverse()
+    # Turns must start with the user, so a dangling answer goes to the summary side
+    while kept and kept[0][0] != USER:
+        kept.pop(0)
+
+    older = history[:len(history) - len(kept)]
+    topics = [text[:80] for role, text in older if role == USER]
+    if topics:
+        question = "(Earlier in this conversation the patient asked about: " + "; ".join(topics) + ")\n\n" + question
+
+    contents = [{"role": role, "parts": [text]} for role, text in kept]
+    contents.append({"role": USER, "parts": [question]})
+    return contents
+
+
+# ===== SESSION STORE =====
+class _Session:
+    __slots__ = ("turns", "size", "last_used")
+
+    def __init__(self, max_turns):
+        self.turns = deque(maxlen=max_turns)
+        self.size = 0
+        self.last_used = time.monotonic()
+
+
+class ConversationStore:
+    """Per-session turn history with a global memory cap.
+
+    Sessions are kept in LRU order; idle ones expire after ``idle_ttl``
+    seconds and the least recently used are evicted once the stored text
+    exceeds ``max_bytes``. With ``db_path`` every turn is also written to
+    SQLite, which then is the source of truth: ``history()`` reads it on
+    every call, so worker processes sharing the file see each other's turns.
+    """
+
+    def __init__(self, max_turns=20, max_bytes=32 * 1024 * 1024, idle_ttl=1800, db_path=None):
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.db_path = db_path
+        self.total_bytes = 0
+        self.evictions = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        if db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS conversation_turns ("
+                    " session_id TEXT NOT NULL, role TEXT NOT NULL, text TEXT NOT NULL,"
+                    " created_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_conversation_turns_session"
+                    " ON conversation_turns (session_id, created_at)"
+                )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=1.0)
+
+    def history(self, session_id):
+        """Return the session's turns as a list of (role, text), oldest first."""
+        turns = self._load(session_id)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if turns is None:
+                # No database, or it could not be read: memory is all we have
+                if session is None:
+                    return []
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+                return list(session.turns)
+
+            # Replace the in-memory copy, which may miss turns from other workers
+            if session is not None:
+                del self._sessions[session_id]
+                self.total_bytes -= session.size
+            if not turns:
+                return []
+            session = self._sessions[session_id] = _Session(self.max_turns)
+            for role, text in turns:
+                self._append(session, role, text)
+            self._evict()
+            return list(session.turns)
+
+    def add_exchange(self, session_id, question, answer):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session(self.max_turns)
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            self._append(session, USER, question)
+            self._append(session, MODEL, answer)
+            self._evict()
+        self._save(session_id, [(USER, question), (MODEL, answer)])
+
+    def clear(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self.total_bytes -= session.size
+        if not self.db_path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM conversation_turns WHERE session_id = ?", (session_id,))
+        except sqlite3.Error as e:
+            logger.warning("Conversation delete error", extra={"error": str(e)})
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+    # Caller must hold self._lock
+    def _append(self, session, role, text):
+        if len(session.turns) == session.turns.maxlen:
+            _, dropped = session.turns[0]
+            session.size -= len(dropped)
+            self.total_bytes -= len(dropped)
+        session.turns.append((role, text))
+        session.size += len(text)
+        self.total_bytes += len(text)
+
+    # Caller must hold self._lock
+    def _evict(self):
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            idle = now - session.last_used > self.idle_ttl
+            if not idle and self.total_bytes <= self.max_bytes:
+                break
+            del self._sessions[session_id]
+            self.total_bytes -= session.size
+            self.evictions += 1
+
+    def _load(self, session_id):
+        """Stored turns, or None when there is no database or reading it failed."""
+        if not self.db_path:
+            return None
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT role, text FROM conversation_turns WHERE session_id = ? AND created_at > ?"
+                    " ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                    (session_id, time.time() - self.idle_ttl, self.max_turns),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Conversation load error", extra={"error": str(e)})
+            return None
+        return list(reversed(rows))
+
+    def _save(self, session_id, turns):
+        if not self.db_path:
+            return
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO conversation_turns (session_id, role, text, created_at) VALUES (?, ?, ?, ?)",
+                    [(session_id, role, text, now) for role, text in turns],
+                )
+                conn.execute("DELETE FROM conversation_turns WHERE created_at <= ?", (now - self.idle_ttl,))
+        except sqlite3.Error as e:
+            logger.warning("Conversation save error", extra={"error": str(e)})
+
+
+def store_from_env():
+    return ConversationStore(
+        max_turns=int(os.getenv("CONVERSATION_MAX_TURNS", "20")),
+        max_bytes=int(os.getenv("CONVERSATION_MAX_BYTES", str(32 * 1024 * 1024))),
+        idle_ttl=float(os.getenv("CONVERSATION_IDLE_TTL", "1800")),
+        db_path=os.getenv("CONVERSATION_DB") or None,
+    )
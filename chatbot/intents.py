@@ -0,0 +1,127 @@
+import json
+import os
+import re
+from collections import deque
+
+DEFAULT_INTENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intents.json")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    return _WHITESPACE.sub(" ", text.lower()).strip()
+
+
+# ===== MULTI-PATTERN MATCHER =====
+class KeywordMatcher:
+    """Aho-Corasick automaton: finds every keyword in a single pass over the text.
+
+    Matches only count on word boundaries, so "drugs" does not fire inside
+    "drugstore". Per-call cost depends on the text length, not on how many
+    keywords are registered.
+    """
+
+    def __init__(self, keywords):
+        # keywords: iterable of (keyword, value)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for keyword, value in keywords:
+            self._add(normalize_text(keyword), value)
+        self._build_failure_links()
+
+    def _add(self, keyword, value):
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(keyword), value))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def iter_matches(self, text):
+        """Yield (start, end, value) for each keyword occurrence on word boundaries."""
+        goto, fail, out = self._goto, self._fail, self._out
+        length = len(text)
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            if end < length and text[end].isalnum():
+                continue
+            for size, value in out[state]:
+                start = end - size
+                if start == 0 or not text[start - 1].isalnum():
+                    yield start, end, value
+
+
+# ===== INTENT REGISTRY =====
+class IntentRegistry:
+    """Intents loaded from a JSON file and compiled once into a KeywordMatcher.
+
+    When several intents match, the highest ``priority`` wins; ties go to
+    the intent whose keyword appears first.
+    """
+
+    def __init__(self, intents):
+        self.intents = {intent["name"]: intent for intent in intents}
+        self._priority = {name: intent.get("priority", 0) for name, intent in self.intents.items()}
+        self._top_priority = max(self._priority.values(), default=0)
+        self.matcher = KeywordMatcher(
+            (keyword, intent["name"])
+            for intent in intents
+            for keyword in intent.get("keywords", [])
+        )
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_INTENTS_FILE):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["intents"])
+
+    def detect(self, question):
+        best = None
+        for _, _, name in self.matcher.iter_matches(normalize_text(question)):
+            if best is None or self._priority[name] > self._priority[best]:
+                best = name
+                if self._priority[name] == self._top_priority:
+                    break
+        return best
+
+    def classify(self, questions):
+        return [self.detect(question) for question in questions]
+
+    def link_response(self, name):
+        intent = self.intents.get(name)
+        if not intent or "url" not in intent:
+            return None
+        url = intent["url"]
+        if intent.get("url_env"):
+            url = os.getenv(intent["url_env"], url)
+        return {
+            "type": "link",
+            "message": intent["message"],
+            "url": url,
+            "text": intent["text"],
+        }
@@ -0,0 +1,277 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from backends import ModelBackend, UpstreamError
+
+# Only failures that a second attempt can fix are retried and count against the
+# breaker; bad requests, auth errors and safety blocks are returned at once.
+# Backends translate their SDK's transient errors into these.
+TRANSIENT_ERRORS = (TimeoutError, FutureTimeoutError, UpstreamError)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+
+# ===== CIRCUIT BREAKER =====
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    While open every call fails fast; after ``cooldown`` seconds a single
+    probe call is let through (half-open) and its outcome closes or
+    re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.short_circuits = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.short_circuits += 1
+            raise CircuitOpen("Model upstream is unavailable")
+
+    def allows_retry(self):
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+# ===== LATENCY TRACKING =====
+class LatencyWindow:
+    """Recent successful call latencies, used to pick the hedging delay."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q, min_samples=20):
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+# ===== RESILIENT BACKEND =====
+class ResilientBackend(ModelBackend):
+    """Wraps a backend with timeouts, retries, optional hedging and a breaker.
+
+    Each attempt is capped at ``call_timeout`` and by what is left of the
+    caller's ``timeout``. Attempts that fail with a ``TRANSIENT_ERRORS``
+    error are retried up to ``max_attempts`` times with jittered exponential
+    backoff; other errors are raised straight away. With ``hedge_percentile`` set,
+    a second identical request is sent once the first has run longer than
+    that percentile of recent latencies, and whichever answers first wins.
+    Streams are retried only until their first chunk arrives and are never
+    hedged.
+
+    With a ``limiter`` a hedge must take one of its free slots, so hedges
+    never push upstream concurrency past ``max_in_flight``; when every slot
+    is busy the call just waits for the first request. The call that lost a
+    race still runs until its own timeout after its slot is released, so
+    upstream concurrency can briefly exceed the cap by those calls; the
+    hedge pool (2 x ``max_in_flight`` threads) bounds them.
+    """
+
+    def __init__(self, backend, call_timeout=20.0, max_attempts=2, backoff=0.2,
+                 hedge_percentile=None, hedge_min_delay=0.5, breaker=None, max_workers=32,
+                 limiter=None):
+        self.backend = backend
+        self.name = backend.name
+        self.call_timeout = call_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter
+        self.latency = LatencyWindow()
+        self.retries = 0
+        self.hedges = 0
+        self.hedges_skipped = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self._counter_lock = threading.Lock()
+        if limiter is not None:
+            max_workers = 2 * limiter.max_in_flight
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge") \
+            if hedge_percentile else None
+
+    def _count(self, name):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def warm(self):
+        self.backend.warm()
+
+    def stats(self):
+        return {
+            "breaker_state": self.breaker.state,
+            "breaker_failures": self.breaker.failures,
+            "short_circuits": self.breaker.short_circuits,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+        }
+
+    # ----- attempts -----
+    def _sleep_backoff(self, attempt, expires_at):
+        # Full jitter: uniform in [0, backoff * 2^attempt], never past the deadline
+        delay = random.uniform(0, self.backoff * (2 ** attempt))
+        time.sleep(max(0.0, min(delay, expires_at - time.monotonic())))
+
+    def _timed_generate(self, prompt, timeout):
+        start = time.monotonic()
+        result = self.backend.generate(prompt, timeout=timeout)
+        self.latency.add(time.monotonic() - start)
+        return result
+
+    def _hedged_generate(self, prompt, timeout):
+        expires_at = time.monotonic() + timeout
+        primary = self._pool.submit(self._timed_generate, prompt, timeout)
+        delay = self.latency.percentile(self.hedge_percentile)
+        if delay is None or max(delay, self.hedge_min_delay) >= timeout:
+            return primary.result(timeout=timeout)
+
+        delay = max(delay, self.hedge_min_delay)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        if self.limiter is not None and not self.limiter.try_acquire():
+            # Every slot is busy: a hedge would only add load to a saturated upstream
+            self._count("hedges_skipped")
+            return primary.result(timeout=max(0.0, expires_at - time.monotonic()))
+        self._count("hedges")
+        hedge = self._pool.submit(self._timed_generate, prompt, expires_at - time.monotonic())
+        if self.limiter is not None:
+            hedge.add_done_callback(lambda _: self.limiter.release())
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, expires_at - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    # The slower call keeps running until its own timeout; its result is dropped
+                    return future.result()
+                error = future.exception()
+        if error is not None:
+            raise error
+        raise TimeoutError("Model call timed out")
+
+    def _attempt(self, prompt, timeout):
+        if self._pool:
+            return self._hedged_generate(prompt, timeout)
+        return self._timed_generate(prompt, timeout)
+
+    def _with_retries(self, call, timeout):
+        expires_at = time.monotonic() + (timeout if timeout is not None else self.call_timeout)
+        self.breaker.before_call()
+        attempt = 0
+        while True:
+            remaining = expires_at - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise TimeoutError("Model call timed out")
+                result = call(min(self.call_timeout, remaining))
+            except TRANSIENT_ERRORS as e:
+                if isinstance(e, (TimeoutError, FutureTimeoutError)):
+                    self._count("timeouts")
+                self.breaker.record_failure()
+                attempt += 1
+                if attempt >= self.max_attempts or not self.breaker.allows_retry() \
+                        or expires_at - time.monotonic() <= 0:
+                    raise
+                self._count("retries")
+                self._sleep_backoff(attempt - 1, expires_at)
+                continue
+            except Exception:
+                # The upstream answered, so it is reachable; this also ends a half-open probe
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            return result
+
+    # ----- backend interface -----
+    def generate(self, prompt, timeout=None):
+        return self._with_retries(lambda attempt_timeout: self._attempt(prompt, attempt_timeout), timeout)
+
+    def stream(self, prompt, timeout=None):
+        def open_stream(attempt_timeout):
+            # Retrying is only safe until the first chunk has been handed to the caller
+            chunks = iter(self.backend.stream(prompt, timeout=attempt_timeout))
+            return chunks, next(chunks, None)
+
+        chunks, first = self._with_retries(open_stream, timeout)
+        if first is None:
+            return
+        yield first
+        try:
+            yield from chunks
+        except TRANSIENT_ERRORS:
+            self.breaker.record_failure()
+            raise
+
+
+def resilient_from_env(backend, limiter=None):
+    hedge = os.getenv("HEDGE_PERCENTILE")
+    return ResilientBackend(
+        backend,
+        call_timeout=float(os.getenv("MODEL_CALL_TIMEOUT", "20")),
+        max_attempts=int(os.getenv("MODEL_MAX_ATTEMPTS", "2")),
+        backoff=float(os.getenv("MODEL_RETRY_BACKOFF", "0.2")),
+        hedge_percentile=float(hedge) if hedge else None,
+        hedge_min_delay=float(os.getenv("HEDGE_MIN_DELAY", "0.5")),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("BREAKER_FAILURES", "5")),
+            cooldown=float(os.getenv("BREAKER_COOLDOWN", "30")),
+        ),
+        limiter=limiter,
+    )
@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("chatbot")
+
+# ===== KEY NORMALIZATION =====
+# Only true filler: greetings, politeness and articles. Words such as "for", "can",
+# "i", "you" or "do" change what is being asked and must stay in the key.
+STOPWORDS = frozenset({
+    "a", "an", "the", "please", "pls", "hi", "hello", "hey", "thanks", "thank",
+})
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def normalize_question(question):
+    """Reduce a question to a cache key: lowercase, no punctuation or filler words."""
+    words = _PUNCTUATION.sub(" ", question.lower()).split()
+    kept = [word for word in words if word not in STOPWORDS]
+    # A question made only of stopwords still needs a stable, non-empty key
+    return " ".join(kept or words)
+
+
+# ===== RESPONSE CACHE =====
+class ResponseCache:
+    """Bounded LRU cache with TTL, optionally backed by a shared SQLite file.
+
+    The in-memory tier is per process; the SQLite tier (``db_path``) lets
+    several workers on the same host reuse each other's answers.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS response_cache ("
+                    " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=1.0)
+
+    def get(self, question):
+        key = normalize_question(question)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value, remaining = self._get_shared(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Expire together with the shared row rather than a full ttl from now
+            self._store(key, value, now + remaining)
+        return value
+
+    def set(self, question, value):
+        key = normalize_question(question)
+        with self._lock:
+            self._store(key, value, time.monotonic() + self.ttl)
+        self._set_shared(key, value)
+
+    def invalidate(self, question):
+        key = normalize_question(question)
+        with self._lock:
+            self._entries.pop(key, None)
+        self._delete_shared("DELETE FROM response_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._delete_shared("DELETE FROM response_cache")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    # Caller must hold self._lock
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # The shared tier uses wall-clock time since it outlives any one process
+    def _get_shared(self, key):
+        """Return (value, seconds left), or (None, 0) on a miss."""
+        if not self.db_path:
+            return None, 0
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM response_cache WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Cache read error", extra={"error": str(e)})
+            return None, 0
+        if not row:
+            return None, 0
+        return json.loads(row[0]), row[1] - now
+
+    def _set_shared(self, key, value):
+        if not self.db_path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time() + self.ttl),
+                )
+                # Keep the shared file bounded as well
+                conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+                conn.execute(
+                    "DELETE FROM response_cache WHERE key NOT IN ("
+                    " SELECT key FROM response_cache ORDER BY expires_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.warning("Cache write error", extra={"error": str(e)})
+
+    def _delete_shared(self, sql, params=()):
+        if not self.db_path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logger.warning("Cache delete error", extra={"error": str(e)})
+
+
+def cache_from_env():
+    db_path = os.getenv("RESPONSE_CACHE_DB") or None
+    return ResponseCache(
+        max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        db_path=db_path,
+    )
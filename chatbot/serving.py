@@ -0,0 +1,188 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("chatbot")
+
+
+class Overloaded(Exception):
+    """Raised when a model call cannot be admitted; maps to HTTP 503."""
+
+    def __init__(self, reason, retry_after=1):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of its time budget."""
+
+
+# ===== DEADLINES =====
+class Deadline:
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded("Request deadline exceeded")
+
+
+# ===== ADMISSION CONTROL =====
+class ConcurrencyLimiter:
+    """Caps in-flight model calls and keeps a short, bounded wait queue.
+
+    Requests beyond ``max_in_flight`` wait for a slot; once ``max_queue``
+    requests are already waiting, new ones are rejected immediately so the
+    server sheds load instead of piling up threads.
+    """
+
+    def __init__(self, max_in_flight=8, max_queue=16, queue_timeout=5.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._slots = threading.Semaphore(max_in_flight)
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a free slot without queueing; False when none is free."""
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def acquire(self, deadline=None):
+        if self.try_acquire():
+            return
+
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("Too many requests queued")
+            self.waiting += 1
+
+        timeout = self.queue_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+        try:
+            acquired = self._slots.acquire(timeout=timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+        with self._lock:
+            if not acquired:
+                self.rejected += 1
+                raise Overloaded("Timed out waiting for a free slot")
+            self.in_flight += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def slot(self, deadline=None):
+        return _Slot(self, deadline)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "rejected": self.rejected,
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+            }
+
+
+class _Slot:
+    def __init__(self, limiter, deadline):
+        self.limiter = limiter
+        self.deadline = deadline
+
+    def __enter__(self):
+        self.limiter.acquire(self.deadline)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.limiter.release()
+        return False
+
+
+# Threads kept free for /healthz, /metrics and answers that never touch the model
+NON_MODEL_THREADS = 4
+
+
+def server_threads(limiter):
+    """Worker threads needed so every admitted or queued request holds a thread.
+
+    With fewer threads, excess requests wait in the server's own accept
+    queue, where neither the limiter's 503 nor the request deadline applies.
+    """
+    return int(os.getenv("SERVER_THREADS", limiter.max_in_flight + limiter.max_queue + NON_MODEL_THREADS))
+
+
+def limiter_from_env():
+    # MAX_IN_FLIGHT also caps hedged model requests (see ResilientBackend), apart
+    # from calls that lost a hedge race and are still winding down
+    return ConcurrencyLimiter(
+        max_in_flight=int(os.getenv("MAX_IN_FLIGHT", "8")),
+        max_queue=int(os.getenv("MAX_QUEUE", "16")),
+        queue_timeout=float(os.getenv("QUEUE_TIMEOUT", "5")),
+    )
+
+
+# ===== LAZY INITIALIZATION =====
+class LazyResource:
+    """Builds an expensive object on first use, exactly once across threads.
+
+    A failed build is logged, remembered in ``error`` and retried by a later
+    ``get()`` instead of taking the process down; ``retry_interval`` spaces
+    those retries out so a dead dependency is not hit on every request.
+    """
+
+    def __init__(self, name, factory, retry_interval=0):
+        self.name = name
+        self.factory = factory
+        self.retry_interval = retry_interval
+        self.error = None
+        self.init_seconds = None
+        self._failed_at = None
+        self._value = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._built
+
+    def get(self):
+        if self._built:
+            return self._value
+        if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_interval:
+            return None
+        with self._lock:
+            if not self._built:
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    self.error = str(e)
+                    self._failed_at = time.monotonic()
+                    logger.warning("Initialization failed", extra={"resource": self.name, "error": str(e)})
+                    return None
+                self.error = None
+                self.init_seconds = time.perf_counter() - start
+                self._built = True
+        return self._value
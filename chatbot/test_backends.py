@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from backends import FakeBackend, GeminiBackend, UpstreamError
+
+
+# Stand-ins for the google.generativeai / google.api_core error types
+class BlockedPromptException(Exception):
+    pass
+
+
+class ServiceUnavailable(Exception):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class BlockedResponse:
+    """Non-streamed response to a blocked prompt: no candidates, so .parts raises."""
+
+    usage_metadata = None
+
+    @property
+    def parts(self):
+        raise ValueError("The prompt was blocked")
+
+    @property
+    def text(self):
+        raise ValueError("The prompt was blocked")
+
+
+class BlockedStream:
+    """Streamed response to a blocked prompt: the SDK raises on the first next()."""
+
+    def __iter__(self):
+        raise BlockedPromptException("block_reason: SAFETY")
+        yield
+
+
+class StubModel:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        if self.error:
+            raise self.error
+        return self.response(stream)
+
+
+def gemini_with(model):
+    # Skips __init__, which imports and configures google.generativeai
+    backend = GeminiBackend.__new__(GeminiBackend)
+    backend.model = model
+    backend._blocked_errors = (BlockedPromptException,)
+    backend._timeout_errors = (DeadlineExceeded,)
+    backend._upstream_errors = (ServiceUnavailable,)
+    return backend
+
+
+def test_gemini_blocked_prompt_is_a_blocked_generation():
+    backend = gemini_with(StubModel(lambda stream: BlockedStream() if stream else BlockedResponse()))
+    assert backend.generate("hi").blocked
+    assert [chunk.blocked for chunk in backend.stream("hi")] == [True]
+
+
+@pytest.mark.parametrize("error, expected", [
+    (ServiceUnavailable("503"), UpstreamError),
+    (DeadlineExceeded("504"), TimeoutError),
+    (PermissionError("bad key"), PermissionError),
+])
+def test_gemini_errors_are_translated(error, expected):
+    backend = gemini_with(StubModel(error=error))
+    with pytest.raises(expected):
+        backend.generate("hi")
+    with pytest.raises(expected):
+        next(backend.stream("hi"))
+
+
+def test_fake_stream_adds_up_to_the_full_answer():
+    backend = FakeBackend(latency_ms=0, latency_sigma=0, chunk_ms=0, chunks=4)
+    chunks = list(backend.stream("hi"))
+    assert len(chunks) == 4
+    assert "".join(chunk.text for chunk in chunks) == backend.generate("hi").text
+    assert chunks[-1].usage.response_tokens == backend.response_tokens
+
+
+def test_fake_stream_times_out_when_the_consumer_is_slow():
+    backend = FakeBackend(latency_ms=0, latency_sigma=0, chunk_ms=10, chunks=4)
+    stream = backend.stream("hi", timeout=0.05)
+    next(stream)
+    time.sleep(0.1)
+    with pytest.raises(TimeoutError):
+        next(stream)
@@ -0,0 +1,64 @@
+from conversations import MODEL, USER, ConversationStore, build_contents
+
+
+def test_history_keeps_the_newest_turns():
+    store = ConversationStore(max_turns=4)
+    for i in range(3):
+        store.add_exchange("s1", f"question {i}", f"answer {i}")
+    assert store.history("s1") == [
+        (USER, "question 1"), (MODEL, "answer 1"), (USER, "question 2"), (MODEL, "answer 2"),
+    ]
+    assert store.stats()["bytes"] == sum(len(text) for _, text in store.history("s1"))
+
+
+def test_least_recently_used_session_is_evicted_over_max_bytes():
+    store = ConversationStore(max_bytes=100)
+    store.add_exchange("old", "q" * 30, "a" * 30)
+    store.add_exchange("new", "q" * 30, "a" * 30)
+    assert store.history("old") == []
+    assert store.history("new") == [(USER, "q" * 30), (MODEL, "a" * 30)]
+    assert store.stats()["evictions"] == 1
+
+
+def test_idle_sessions_expire():
+    store = ConversationStore(idle_ttl=0)
+    store.add_exchange("s1", "question", "answer")
+    store.add_exchange("s2", "question", "answer")
+    assert store.history("s1") == []
+
+
+def test_evicted_sessions_reload_from_sqlite(tmp_path):
+    store = ConversationStore(max_bytes=100, db_path=str(tmp_path / "conversations.db"))
+    store.add_exchange("old", "q" * 30, "a" * 30)
+    store.add_exchange("new", "q" * 30, "a" * 30)
+    assert store.history("old") == [(USER, "q" * 30), (MODEL, "a" * 30)]
+    store.clear("old")
+    assert store.history("old") == []
+
+
+def test_older_turns_are_summarized_when_over_budget():
+    history = [(USER, "what is malaria"), (MODEL, "x" * 400), (USER, "is it contagious"), (MODEL, "no")]
+    contents = build_contents(history, "how is it treated", token_budget=40)
+    assert contents[0] == {"role": USER, "parts": ["is it contagious"]}
+    assert contents[-1]["role"] == USER
+    assert "what is malaria" in contents[-1]["parts"][0]
+
+
+def test_clear_survives_a_broken_database(tmp_path):
+    store = ConversationStore(db_path=str(tmp_path / "conversations.db"))
+    store.add_exchange("s1", "question", "answer")
+    store.db_path = str(tmp_path / "missing" / "conversations.db")
+    store.clear("s1")
+    assert store.history("s1") == []
+
+
+def test_workers_sharing_a_database_see_each_others_turns(tmp_path):
+    db_path = str(tmp_path / "conversations.db")
+    first, second = ConversationStore(db_path=db_path), ConversationStore(db_path=db_path)
+    first.add_exchange("s1", "what is malaria", "a disease")
+    assert second.history("s1") == [(USER, "what is malaria"), (MODEL, "a disease")]
+    second.add_exchange("s1", "is it contagious", "no")
+    assert first.history("s1")[-2:] == [(USER, "is it contagious"), (MODEL, "no")]
+    second.clear("s1")
+    assert first.history("s1") == []
+    assert first.stats()["bytes"] == 0
@@ -0,0 +1,36 @@
+from intents import IntentRegistry, KeywordMatcher
+
+
+def values(matcher, text):
+    return [value for _, _, value in matcher.iter_matches(text)]
+
+
+def test_matches_only_on_word_boundaries():
+    matcher = KeywordMatcher([("drugs", "medicine"), ("order", "order_status")])
+    assert values(matcher, "where can i buy drugs") == ["medicine"]
+    assert values(matcher, "the drugstore is closed") == []
+    assert values(matcher, "reorder my pills") == []
+    assert values(matcher, "order, please") == ["order_status"]
+
+
+def test_finds_overlapping_keywords():
+    matcher = KeywordMatcher([("appointment", "appointment"), ("cancel appointment", "cancel")])
+    assert sorted(values(matcher, "cancel appointment")) == ["appointment", "cancel"]
+
+
+def test_highest_priority_intent_wins():
+    registry = IntentRegistry([
+        {"name": "appointment", "priority": 20, "keywords": ["appointment"]},
+        {"name": "cancel_appointment", "priority": 40, "keywords": ["cancel"]},
+        {"name": "medicine", "priority": 10, "keywords": ["medicine"]},
+    ])
+    assert registry.detect("I need an appointment") == "appointment"
+    assert registry.detect("Please CANCEL my appointment") == "cancel_appointment"
+    assert registry.detect("appointment about my medicine") == "appointment"
+    assert registry.detect("what is malaria") is None
+
+
+def test_bundled_intents_load():
+    registry = IntentRegistry.from_file()
+    assert registry.detect("I want to book appointment") == "appointment"
+    assert registry.detect("is paracetamol good for headaches") is None
@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+from medicine_index import MedicineIndex
+
+SCHEMA = """
+CREATE TABLE categories (id INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE medicines (
+    id INTEGER PRIMARY KEY, name TEXT, description TEXT, manufacturer TEXT,
+    price REAL, stock INTEGER, requires_prescription INTEGER, created_at TEXT,
+    category_id INTEGER
+);
+INSERT INTO categories VALUES (1, 'Antibiotics'), (2, 'Pain Relief');
+INSERT INTO medicines VALUES
+    (1, 'Amoxicillin 500mg', 'Broad spectrum antibiotic capsules, available on prescription',
+     'GSK', 5.5, 10, 1, '2024-01-01', 1),
+    (2, 'Paracetamol 500mg', 'Relieves pain and fever, available over the counter',
+     'Emzor', 1.0, 100, 0, '2024-01-01', 2);
+"""
+
+
+@pytest.fixture
+def db():
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    connection.executescript(SCHEMA)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def index(db):
+    return MedicineIndex(db, pharmacy_url="http://pharmacy", refresh_interval=3600)
+
+
+def names(results):
+    return [result["name"] for result in results]
+
+
+def test_search_ranks_by_name(index):
+    results = index.search("do you have paracetamol")
+    assert names(results) == ["Paracetamol 500mg"]
+    assert results[0]["price"] == 1.0
+    assert results[0]["stock"] == 100
+    assert results[0]["requires_prescription"] is False
+    assert results[0]["url"] == "http://pharmacy?search=Paracetamol+500mg"
+
+
+def test_search_matches_category(index):
+    assert names(index.search("antibiotics")) == ["Amoxicillin 500mg"]
+
+
+def test_search_expands_prefixes_and_misspellings(index):
+    assert names(index.search("amoxi")) == ["Amoxicillin 500mg"]
+    assert names(index.search("paracetmol")) == ["Paracetamol 500mg"]
+
+
+def test_description_only_matches_are_not_results(index):
+    assert index.search("capsules") == []
+    assert index.search("is it available") == []
+
+
+def test_refresh_adds_new_rows(db, index):
+    db.execute(
+        "INSERT INTO medicines VALUES (3, 'Ibuprofen 200mg', 'Anti-inflammatory', 'Pfizer',"
+        " 2.0, 50, 0, '2024-02-01', 2)"
+    )
+    assert index.search("ibuprofen") == []
+    index.refresh()
+    assert names(index.search("ibuprofen")) == ["Ibuprofen 200mg"]
+
+
+def test_refresh_updates_stock_and_price(db, index):
+    db.execute("UPDATE medicines SET stock = 0, price = 6.0 WHERE id = 1")
+    index.refresh()
+    result = index.search("amoxicillin")[0]
+    assert result["stock"] == 0
+    assert result["price"] == 6.0
+
+
+def test_refresh_drops_deleted_rows(db, index):
+    db.execute("DELETE FROM medicines WHERE id = 2")
+    index.refresh()
+    assert index.search("paracetamol") == []
+    assert 2 not in index.docs
+
+
+def test_refresh_recovers_after_the_connection_drops(tmp_path):
+    path = str(tmp_path / "medicare.db")
+    setup = sqlite3.connect(path)
+    setup.executescript(SCHEMA)
+    setup.commit()
+
+    attempts = []
+
+    def reconnect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError("server has gone away")
+        return sqlite3.connect(path, check_same_thread=False)
+
+    index = MedicineIndex(sqlite3.connect(path, check_same_thread=False),
+                          refresh_interval=0, reconnect=reconnect)
+    index.connection.close()
+    setup.execute("UPDATE medicines SET stock = 0 WHERE id = 2")
+    setup.commit()
+
+    index.maybe_refresh()  # query and first reconnect fail; the old data is kept
+    assert index.docs[2]["stock"] == 100
+    index.maybe_refresh()
+    assert index.docs[2]["stock"] == 0
+    assert len(attempts) == 2
+    setup.close()
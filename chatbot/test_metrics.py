@@ -0,0 +1,79 @@
+import io
+import json
+import logging
+
+from metrics import JsonFormatter, MetricsRegistry, setup_logging
+
+
+def test_counter_renders_labelled_series():
+    registry = MetricsRegistry()
+    counter = registry.counter("chat_total", "Chats", ("source",))
+    counter.inc(source="cache")
+    counter.inc(2, source='say "hi"\n')
+    assert registry.render().splitlines() == [
+        "# HELP chat_total Chats",
+        "# TYPE chat_total counter",
+        'chat_total{source="cache"} 1',
+        'chat_total{source="say \\"hi\\"\\n"} 2',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="model")
+    histogram.observe(0.5, stage="model")
+    histogram.observe(5.0, stage="model")
+    lines = registry.render().splitlines()
+    assert lines[1] == "# TYPE latency_seconds histogram"
+    assert lines[2:] == [
+        'latency_seconds_bucket{stage="model",le="0.1"} 1',
+        'latency_seconds_bucket{stage="model",le="1.0"} 2',
+        'latency_seconds_bucket{stage="model",le="+Inf"} 3',
+        'latency_seconds_sum{stage="model"} 5.55',
+        'latency_seconds_count{stage="model"} 3',
+    ]
+
+
+def test_gauge_reads_its_callback_at_render_time():
+    registry = MetricsRegistry()
+    values = [3]
+    registry.gauge("queue_depth", "Queued", lambda: values[-1])
+    registry.gauge("rejected_total", "Rejected", lambda: 7, kind="counter")
+    values.append(4)
+    assert registry.render().splitlines() == [
+        "# HELP queue_depth Queued", "# TYPE queue_depth gauge", "queue_depth 4",
+        "# HELP rejected_total Rejected", "# TYPE rejected_total counter", "rejected_total 7",
+    ]
+
+
+def test_queued_log_records_keep_extras_and_tracebacks():
+    logger = setup_logging("test-metrics", level="DEBUG")
+    output = io.StringIO()
+    logger.listener.handlers[0].setStream(output)
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("Server error %s", "x", extra={"error": "boom"})
+    logger.debug("Debug line")
+    logger.listener.stop()
+
+    first, second = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert first["msg"] == "Server error x"
+    assert first["error"] == "boom"
+    assert "RuntimeError: boom" in first["exc"]
+    assert "Traceback" not in first["msg"]
+    assert second["level"] == "DEBUG"
+
+
+def test_log_level_comes_from_the_environment(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "warning")
+    assert setup_logging("test-metrics-level").level == logging.WARNING
+
+
+def test_formatter_writes_one_json_object():
+    record = logging.LogRecord("chatbot", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+    record.stage = "model"
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "hello world"
+    assert entry["stage"] == "model"
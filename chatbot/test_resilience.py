@@ -0,0 +1,137 @@
+import time
+
+import pytest
+
+from backends import Generation, ModelBackend, UpstreamError
+from resilience import CircuitBreaker, CircuitOpen, ResilientBackend
+from serving import ConcurrencyLimiter
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    assert breaker.short_circuits == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allows_retry()
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+
+def test_probe_success_closes_and_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.1)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+class FlakyBackend(ModelBackend):
+    name = "flaky"
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate(self, prompt, timeout=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return Generation("answer", False, None)
+
+
+def resilient(backend, **kwargs):
+    return ResilientBackend(backend, call_timeout=1, backoff=0, **kwargs)
+
+
+def test_transient_errors_are_retried():
+    backend = FlakyBackend([UpstreamError("503")])
+    model = resilient(backend, max_attempts=2)
+    assert model.generate("hi").text == "answer"
+    assert backend.calls == 2
+    assert model.stats()["retries"] == 1
+
+
+def test_other_errors_are_not_retried_or_counted():
+    backend = FlakyBackend([ValueError("bad request")] * 3)
+    model = resilient(backend, max_attempts=3, breaker=CircuitBreaker(failure_threshold=1))
+    with pytest.raises(ValueError):
+        model.generate("hi")
+    assert backend.calls == 1
+    assert model.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_non_transient_probe_failure_does_not_wedge_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    model = resilient(FlakyBackend([UpstreamError("503"), ValueError("bad request")]), breaker=breaker)
+    with pytest.raises(UpstreamError):
+        model.generate("hi")
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.1)
+    with pytest.raises(ValueError):
+        model.generate("hi")
+    assert model.generate("hi").text == "answer"
+
+
+class SlowBackend(ModelBackend):
+    name = "slow"
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def generate(self, prompt, timeout=None):
+        time.sleep(self.seconds)
+        return Generation("answer", False, None)
+
+
+def warmed_hedger(limiter):
+    model = resilient(SlowBackend(0.1), hedge_percentile=50, hedge_min_delay=0.01, limiter=limiter)
+    for _ in range(20):
+        model.latency.add(0.01)
+    return model
+
+
+def test_hedges_take_a_free_limiter_slot():
+    limiter = ConcurrencyLimiter(max_in_flight=2, max_queue=0)
+    model = warmed_hedger(limiter)
+    with limiter.slot():
+        assert model.generate("hi").text == "answer"
+    assert model.stats()["hedges"] == 1
+    time.sleep(0.15)  # the losing call finishes and returns its slot
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_no_hedge_when_every_slot_is_busy():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=0)
+    model = warmed_hedger(limiter)
+    with limiter.slot():
+        assert model.generate("hi").text == "answer"
+    assert model.stats()["hedges"] == 0
+    assert model.stats()["hedges_skipped"] == 1
@@ -0,0 +1,54 @@
+import time
+
+from response_cache import ResponseCache, normalize_question
+
+
+def test_keys_ignore_case_punctuation_and_filler():
+    assert normalize_question("Hi, what is MALARIA?") == normalize_question("what is malaria")
+    assert normalize_question("can i take it") != normalize_question("take it")
+
+
+def test_entries_expire_after_ttl():
+    cache = ResponseCache(max_entries=10, ttl=0.05)
+    cache.set("what is malaria", {"type": "text", "content": "answer"})
+    assert cache.get("What is malaria?") == {"type": "text", "content": "answer"}
+    time.sleep(0.1)
+    assert cache.get("what is malaria") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.set("one", 1)
+    cache.set("two", 2)
+    assert cache.get("one") == 1  # "two" is now the oldest
+    cache.set("three", 3)
+    assert cache.get("two") is None
+    assert cache.get("one") == 1
+    assert cache.get("three") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_shared_tier_survives_a_new_process(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    ResponseCache(db_path=db_path).set("what is malaria", {"content": "answer"})
+    assert ResponseCache(db_path=db_path).get("what is malaria") == {"content": "answer"}
+
+
+def test_shared_hit_keeps_the_shared_expiry(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    ResponseCache(ttl=0.2, db_path=db_path).set("what is malaria", {"content": "answer"})
+    reader = ResponseCache(ttl=3600, db_path=db_path)
+    time.sleep(0.1)
+    assert reader.get("what is malaria") == {"content": "answer"}
+    time.sleep(0.2)
+    assert reader.get("what is malaria") is None
+
+
+def test_clear_survives_a_broken_shared_database(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "cache.db"))
+    cache.set("what is malaria", {"content": "answer"})
+    cache.db_path = str(tmp_path / "missing" / "cache.db")
+    cache.invalidate("what is malaria")
+    cache.clear()
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,51 @@
+import pytest
+
+from serving import ConcurrencyLimiter, LazyResource, Overloaded
+
+
+def test_lazy_resource_builds_once():
+    calls = []
+    resource = LazyResource("thing", lambda: calls.append(1) or "value")
+    assert not resource.ready
+    assert resource.get() == "value"
+    assert resource.get() == "value"
+    assert resource.ready
+    assert calls == [1]
+
+
+def test_lazy_resource_records_and_retries_failures():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("database down")
+        return "value"
+
+    resource = LazyResource("thing", factory)
+    assert resource.get() is None
+    assert resource.error == "database down"
+    assert resource.get() == "value"
+    assert resource.error is None
+
+
+def test_lazy_resource_spaces_out_retries():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        raise ConnectionError("database down")
+
+    resource = LazyResource("thing", factory, retry_interval=60)
+    assert resource.get() is None
+    assert resource.get() is None
+    assert len(attempts) == 1
+
+
+def test_limiter_rejects_once_the_queue_is_full():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=0)
+    with limiter.slot():
+        with pytest.raises(Overloaded):
+            limiter.acquire()
+    assert limiter.stats()["rejected"] == 1
+    assert limiter.stats()["in_flight"] == 0
@@ -0,0 +1,24 @@
+from training import rewrite_bullets
+
+
+def rewrite(chunks):
+    return "".join(rewrite_bullets(chunks))
+
+
+def test_rewrites_bullets_within_a_chunk():
+    assert rewrite(["Tips:\n* rest\n* fluids"]) == "Tips:\n- rest\n- fluids"
+
+
+def test_rewrites_bullets_split_across_chunks():
+    assert rewrite(["Tips:\n*", " rest\n", "*", " fluids"]) == "Tips:\n- rest\n- fluids"
+
+
+def test_keeps_a_trailing_star():
+    assert list(rewrite_bullets(["2 *", "3"])) == ["2 ", "*3"]
+    assert rewrite(["note *"]) == "note *"
+
+
+def test_matches_the_whole_text_rewrite_at_every_split():
+    text = "**Note**: \n* rest * fluids\n*see a doctor*"
+    for split in range(len(text) + 1):
+        assert rewrite([text[:split], text[split:]]) == text.replace("* ", "- ")
@@ -0,0 +1,114 @@
+import json
+import threading
+
+import pytest
+
+from serving import ConcurrencyLimiter
+
+
+def events(response):
+    return [json.loads(line[len("data: "):]) for line in response.get_data(as_text=True).splitlines()
+            if line.startswith("data: ")]
+
+
+def test_stream_sends_deltas_then_done(client):
+    response = client.post("/chat/stream", json={"message": "what is malaria", "cache": False})
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    sent = events(response)
+    assert [event["type"] for event in sent[:-1]] == ["delta"] * (len(sent) - 1)
+    assert sent[-1] == {"type": "done"}
+    text = "".join(event["content"] for event in sent[:-1])
+    assert text and "* " not in text
+
+
+def test_stream_sends_local_answers_as_one_event(client):
+    sent = events(client.post("/chat/stream", json={"message": "I want to book appointment"}))
+    assert [event["type"] for event in sent] == ["link"]
+
+
+def test_stream_rejects_non_string_messages(client):
+    response = client.post("/chat/stream", json={"message": 5})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid request"}
+
+
+def test_stream_errors_before_the_first_event_are_json(client, training, monkeypatch):
+    def broken(question):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(training, "local_response", broken)
+    response = client.post("/chat/stream", json={"message": "what is malaria"})
+    assert response.status_code == 500
+    assert response.get_json() == {"error": "Server error"}
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+def test_overload_is_a_503_with_retry_after(client, training, monkeypatch, path):
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=0)
+    monkeypatch.setattr(training, "model_slots", limiter)
+    with limiter.slot():
+        response = client.post(path, json={"message": "what is malaria", "cache": False})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.get_json()["reason"] == "Too many requests queued"
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_metrics_use_the_prometheus_text_format(client):
+    client.post("/chat", json={"message": "I want to book appointment"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    assert "# TYPE chatbot_stage_seconds histogram" in text
+    assert 'chatbot_stage_seconds_bucket{stage="intent",le="+Inf"}' in text
+    assert 'chatbot_responses_total{source="link"}' in text
+    for line in text.splitlines():
+        assert line.startswith("#") or len(line.rsplit(" ", 1)) == 2
+
+
+def test_readyz_turns_ready_after_a_lazy_warm_up(client, training, monkeypatch):
+    monkeypatch.setattr(training, "model_warmed", threading.Event())
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json()["status"] == "starting"
+
+    assert training.model_warmed.wait(5)
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "ready"
+    assert response.get_json()["ready_seconds"] > 0
+
+
+def test_healthz_is_always_ok(client):
+    assert client.get("/healthz").get_json() == {"status": "ok"}
+
+
+def test_follow_ups_are_not_answered_from_the_cache(client, training):
+    hits = training.response_cache.stats()["hits"]
+    client.post("/chat", json={"message": "side effects of paracetamol", "session_id": "cache-first"})
+    assert training.response_cache.stats()["entries"] == 1
+
+    client.post("/chat", json={"message": "what is malaria", "session_id": "cache-second"})
+    client.post("/chat", json={"message": "side effects of paracetamol", "session_id": "cache-second"})
+    assert training.response_cache.stats()["hits"] == hits
+    assert training.response_cache.stats()["entries"] == 2
+
+
+def test_outage_fallback_respects_the_cache_decision(client, training, monkeypatch):
+    answer = {"type": "text", "content": "Malaria is spread by mosquitoes."}
+    training.response_cache.set("what is malaria", answer)
+
+    def down(prompt, timeout=None):
+        raise training.CircuitOpen("Model upstream is unavailable")
+
+    monkeypatch.setattr(training.get_model(), "generate", down)
+    assert client.post("/chat", json={"message": "what is malaria"}).get_json() == answer
+
+    response = client.post("/chat", json={"message": "what is malaria", "cache": False})
+    assert response.get_json()["content"] == training.UNAVAILABLE_MESSAGE
+
+    training.conversations.add_exchange("outage", "I was bitten by mosquitoes", "See a doctor.")
+    response = client.post("/chat", json={"message": "what is malaria", "session_id": "outage"})
+    assert response.get_json()["content"] == training.UNAVAILABLE_MESSAGE
@@ -1,9 +1,24 @@
-import google.generativeai as genai
+import time
+
+# Measured from here so cold-start time covers imports as well as initialization
+PROCESS_START = time.perf_counter()
+
 import textwrap
 import os
-from flask import Flask, request, jsonify
+import json
+import re
+import threading
+from flask import Blueprint, Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
+from backends import backend_from_env
+from conversations import build_contents, store_from_env
+from intents import DEFAULT_INTENTS_FILE, IntentRegistry
+from medicine_index import index_from_env
+from metrics import MetricsRegistry, setup_logging
+from resilience import CircuitOpen, resilient_from_env
+from response_cache import cache_from_env
+from serving import Deadline, LazyResource, Overloaded, limiter_from_env, server_threads
 
 # Load environment variables from .env file
 load_dotenv()
@@ -14,144 +29,561 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 BOOKING_URL = os.getenv("BOOKING_URL", "http://localhost/medicare/appointment.php")
 PHARMACY_URL = os.getenv("PHARMACY_URL", "http://localhost/medicare/epharmacy.php")
 
-if not GOOGLE_API_KEY:
-    print("❌ WARNING: GOOGLE_API_KEY environment variable not set.")
-    exit("API Key not configured.")
+# MODEL_BACKEND=fake runs without network access or an API key (CI, load tests)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "gemini")
 
 MODEL_NAME = "gemini-1.5-pro-latest"
+# Seconds a single chat request may spend waiting for a slot plus the model call
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "30"))
+
+# ===== OBSERVABILITY =====
+# Log records are written by a background thread so request threads never block on stdout
+logger = setup_logging()
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "chatbot_stage_seconds", "Time spent in each stage of answering a chat message", ("stage",))
+request_seconds = metrics.histogram(
+    "chatbot_request_seconds", "End-to-end chat request latency", ("endpoint",))
+intents_total = metrics.counter("chatbot_intents_total", "Detected intents", ("intent",))
+responses_total = metrics.counter(
+    "chatbot_responses_total", "Chat answers by where they came from", ("source",))
+errors_total = metrics.counter("chatbot_errors_total", "Errors while answering", ("kind",))
+safety_blocked_total = metrics.counter(
+    "chatbot_safety_blocked_total", "Model responses returned without parts (safety blocked)")
+tokens_total = metrics.counter("chatbot_tokens_total", "Model token usage", ("kind",))
 
-# ===== INITIALIZATION =====
-try:
-    genai.configure(api_key=GOOGLE_API_KEY)
-except Exception as e:
-    print(f"❌ Error configuring GenerativeAI: {e}")
-    exit(1)
+def record_usage(usage):
+    if usage is None:
+        return
+    tokens_total.inc(usage.prompt_tokens, kind="prompt")
+    tokens_total.inc(usage.response_tokens, kind="response")
 
 # ===== MODEL INITIALIZATION =====
+if MODEL_BACKEND == "gemini" and not GOOGLE_API_KEY:
+    # Keep serving local answers; /readyz reports the model as unavailable
+    logger.warning("GOOGLE_API_KEY environment variable not set")
+
+# The backend (and the google.generativeai import behind it) is built on first use
+# or by warm_up(), never at import time, so a worker can start serving immediately
 def initialize_model():
+    if MODEL_BACKEND == "gemini" and not GOOGLE_API_KEY:
+        raise RuntimeError("API Key not configured.")
+    backend = backend_from_env(GOOGLE_API_KEY, MODEL_NAME, SYSTEM_INSTRUCTIONS)
+    logger.info("Model backend initialized", extra={"backend": backend.name})
+    # Timeouts, retries, hedging and the circuit breaker wrap every model call;
+    # hedged requests take spare model_slots so they count against MAX_IN_FLIGHT
+    return resilient_from_env(backend, limiter=model_slots)
+
+model_resource = LazyResource("model", initialize_model)
+model_warmed = threading.Event()
+
+def get_model():
+    return model_resource.get()
+
+def resilience_stat(name):
+    if not model_resource.ready:
+        return 0
+    return model_resource.get().stats()[name]
+
+startup = {"ready_seconds": None}
+
+def warm_up():
+    """Build the backend and medicine index and open the upstream connection.
+
+    Runs before the worker takes traffic (see create_app), or on the first
+    /readyz probe with PREWARM=off; /readyz turns green once it succeeds.
+    """
+    model = get_model()
+    medicine_index_resource.get()
+    if not model:
+        logger.error("Model initialization failed", extra={"error": model_resource.error})
+        return False
     try:
-        generation_config = {
-            "temperature": 0.9,
-            "top_p": 1,
-            "top_k": 1,
-            "max_output_tokens": 2048,
-        }
-        safety_settings = [
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-        ]
-        model = genai.GenerativeModel(
-            model_name=MODEL_NAME,
-            generation_config=generation_config,
-            safety_settings=safety_settings
-        )
-        print("✅ Gemini Model Initialized")
-        return model
+        model.warm()
     except Exception as e:
-        print(f"❌ Error initializing model: {e}")
-        return None
+        # The connection will be opened by the first real request instead
+        logger.warning("Model warm-up call failed", extra={"error": str(e)})
+    model_warmed.set()
+    startup["ready_seconds"] = time.perf_counter() - PROCESS_START
+    logger.info("Worker ready", extra={
+        "ready_seconds": round(startup["ready_seconds"], 3),
+        "model_init_seconds": round(model_resource.init_seconds, 3),
+    })
+    return True
+
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+def start_warm_up():
+    """Run warm_up() on a background thread unless it already succeeded or is running."""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if model_warmed.is_set() or (_warm_up_thread and _warm_up_thread.is_alive()):
+            return
+        _warm_up_thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+        _warm_up_thread.start()
 
-model = initialize_model()
-if not model:
-    exit("❌ Exiting due to model initialization failure.")
+# ===== RESPONSE CACHE =====
+# Answers to repeated questions are served locally instead of calling the model again
+response_cache = cache_from_env()
+
+# ===== CONVERSATIONS =====
+# Clients send a session_id; earlier turns are kept here instead of being re-sent
+conversations = store_from_env()
+# Approximate prompt tokens allowed for history plus the new question
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1500"))
+
+# ===== CONCURRENCY LIMITS =====
+# Bounds in-flight model calls per worker and sheds load once the wait queue is full
+model_slots = limiter_from_env()
+
+metrics.gauge("chatbot_cache_hits_total", "Response cache hits",
+              lambda: response_cache.stats()["hits"], kind="counter")
+metrics.gauge("chatbot_cache_misses_total", "Response cache misses",
+              lambda: response_cache.stats()["misses"], kind="counter")
+metrics.gauge("chatbot_cache_entries", "Entries in the in-process response cache",
+              lambda: response_cache.stats()["entries"])
+metrics.gauge("chatbot_model_calls_in_flight", "Model calls currently running",
+              lambda: model_slots.stats()["in_flight"])
+metrics.gauge("chatbot_model_calls_waiting", "Requests queued for a model slot",
+              lambda: model_slots.stats()["waiting"])
+metrics.gauge("chatbot_overload_rejections_total", "Requests rejected with 503",
+              lambda: model_slots.stats()["rejected"], kind="counter")
+metrics.gauge("chatbot_conversation_sessions", "Conversations held in memory",
+              lambda: conversations.stats()["sessions"])
+metrics.gauge("chatbot_conversation_bytes", "Bytes of conversation text held in memory",
+              lambda: conversations.stats()["bytes"])
+metrics.gauge("chatbot_breaker_open", "1 while the model circuit breaker is open or half-open",
+              lambda: int(resilience_stat("breaker_state") in ("open", "half_open")))
+metrics.gauge("chatbot_breaker_short_circuits_total", "Model calls refused by the open breaker",
+              lambda: resilience_stat("short_circuits"), kind="counter")
+metrics.gauge("chatbot_model_retries_total", "Model call retries",
+              lambda: resilience_stat("retries"), kind="counter")
+metrics.gauge("chatbot_model_hedges_total", "Hedged second model requests sent",
+              lambda: resilience_stat("hedges"), kind="counter")
+metrics.gauge("chatbot_model_hedges_skipped_total", "Hedges not sent because no model slot was free",
+              lambda: resilience_stat("hedges_skipped"), kind="counter")
+metrics.gauge("chatbot_model_hedge_wins_total", "Hedged requests that answered first",
+              lambda: resilience_stat("hedge_wins"), kind="counter")
+metrics.gauge("chatbot_model_timeouts_total", "Model call attempts that timed out",
+              lambda: resilience_stat("timeouts"), kind="counter")
+metrics.gauge("chatbot_ready_seconds", "Seconds from process start until the worker was ready",
+              lambda: startup["ready_seconds"] or 0)
 
 # ===== INTENT DETECTION =====
+# Keyword intents live in intents.json and are compiled once into a single-pass matcher
+intent_registry = IntentRegistry.from_file(os.getenv("INTENTS_FILE", DEFAULT_INTENTS_FILE))
+
 def detect_intent(question):
-    question_lower = question.lower().strip()
+    return intent_registry.detect(question)
+
+# ===== MEDICINE CATALOG =====
+# Pharmacy questions are answered from our own stock when MEDICINE_DB is configured,
+# e.g. mysql://root:@localhost/medicare or sqlite:///medicare.db
+# A failed build (database down) is retried at most every MEDICINE_INDEX_RETRY seconds
+medicine_index_resource = LazyResource(
+    "medicine_index",
+    lambda: index_from_env(PHARMACY_URL),
+    retry_interval=float(os.getenv("MEDICINE_INDEX_RETRY", "30")),
+)
+
+def catalog_response(question, intent):
+    if intent not in ("catalog", "medicine"):
+        return None
+    medicine_index = medicine_index_resource.get()
+    if not medicine_index:
+        return None
+    results = medicine_index.search(question)
+    if not results:
+        return None
+    return {
+        "type": "medicines",
+        "message": "Here is what we have in our pharmacy:",
+        "results": results,
+        "url": PHARMACY_URL,
+        "text": "Open Pharmacy"
+    }
+
+# ===== RESPONSE GENERATION =====
+def link_response(intent):
+    return intent_registry.link_response(intent)
+
+def local_response(question):
+    """Answers that never need the model: catalog hits and link intents."""
+    with stage_seconds.time(stage="intent"):
+        intent = detect_intent(question)
+    intents_total.inc(intent=intent or "none")
+    with stage_seconds.time(stage="catalog"):
+        local = catalog_response(question, intent)
+    local = local or link_response(intent)
+    if local:
+        responses_total.inc(source=local["type"])
+    return local
+
+def cached_response(question):
+    cached = response_cache.get(question)
+    if cached is not None:
+        responses_total.inc(source="cache")
+    return cached
+
+# Static instructions are bound to the model as its system instruction, so each
+# request only carries the conversation itself
+SYSTEM_INSTRUCTIONS = textwrap.dedent("""\
+    You are a medical information assistant AI.
+    **Instructions:**
+    - Be extremely concise (2-3 sentences max)
+    - Use simple language
+    - Use lists when appropriate
+    - Include disclaimer""")
+
+def build_prompt(question, history=()):
+    return build_contents(list(history), question, CONVERSATION_TOKEN_BUDGET)
+
+def remember(session_id, question, result):
+    if not session_id or not isinstance(result, dict):
+        return
+    answer = result.get("content") or result.get("message")
+    if answer:
+        conversations.add_exchange(session_id, question, answer)
+
+UNAVAILABLE_MESSAGE = (
+    "Our medical assistant is temporarily unavailable. Please try again in a few minutes, "
+    "or book an appointment to speak with a doctor."
+)
+
+def fallback_response(question, error, use_cache=True):
+    """Answer served when the model call failed or the breaker refused it.
+
+    ``use_cache`` is the caller's cache decision: follow-ups and "cache": false
+    requests never get a cached answer, outage or not.
+    """
+    errors_total.inc(kind=type(error).__name__)
+    if not isinstance(error, CircuitOpen):
+        logger.warning("Model call failed", extra={"error": str(error)})
+    cached = response_cache.get(question) if use_cache else None
+    if cached is not None:
+        responses_total.inc(source="fallback_cache")
+        return cached
+    responses_total.inc(source="fallback")
+    if isinstance(error, CircuitOpen):
+        return {"type": "text", "content": UNAVAILABLE_MESSAGE}
+    return {"type": "text", "content": "Sorry, an error occurred."}
+
+def generate_response(question, use_cache=True, deadline=None, session_id=None):
+    local = local_response(question)
+    if local:
+        remember(session_id, question, local)
+        return local
     
-    appointment_keywords = [
-        "book appointment", "schedule visit", "make appointment",
-        "see doctor", "consult doctor", "set meeting",
-        "medical appointment", "doctor booking", "need appointment",
-        "want to see doctor", "doctor visit", "appointment"
-    ]
+    history = conversations.history(session_id) if session_id else []
+    # The cache only serves turns without history. Elliptical follow-ups ("side
+    # effects?", "for children?") can't be told apart from fresh questions reliably,
+    # and a cached answer would ignore what the patient said earlier. The cost is
+    # that, since the widget always sends a session_id, only each conversation's
+    # first question reads or fills the cache.
+    use_cache = use_cache and not history
+    if use_cache:
+        cached = cached_response(question)
+        if cached is not None:
+            remember(session_id, question, cached)
+            return cached
     
-    medicine_keywords = [
-        "buy medicine", "order drugs", "purchase medicine",
-        "get medication", "need pills", "get prescription",
-        "pharmacy order", "refill meds", "order medication",
-        "need drugs", "want medicine", "medicine", "drugs"
-    ]
+    model = get_model()
+    if not model:
+        return {"type": "text", "content": "Model is not initialized."}
     
-    if any(keyword in question_lower for keyword in appointment_keywords):
-        return "appointment"
+    deadline = deadline or Deadline(REQUEST_DEADLINE)
+    # Overloaded propagates to the endpoint so it can answer 503 straight away
+    with model_slots.slot(deadline):
+        try:
+            deadline.check()
+            with stage_seconds.time(stage="prompt"):
+                prompt = build_prompt(question, history)
+            with stage_seconds.time(stage="model"):
+                response = model.generate(prompt, timeout=deadline.remaining())
+            record_usage(response.usage)
+            
+            if response.blocked:
+                safety_blocked_total.inc()
+                return {"type": "text", "content": "Sorry, I couldn't generate a response."}
+            
+            with stage_seconds.time(stage="postprocess"):
+                response_text = response.text.replace('* ', '- ')
+                result = {"type": "text", "content": response_text}
+            if use_cache:
+                response_cache.set(question, result)
+            remember(session_id, question, result)
+            responses_total.inc(source="model")
+            return result
+            
+        except Exception as e:
+            return fallback_response(question, e, use_cache)
+
+# ===== STREAMING RESPONSE GENERATION =====
+def rewrite_bullets(chunks):
+    """Apply the '* ' -> '- ' rewrite to streamed text, even when split across chunks."""
+    pending = ""
+    for chunk in chunks:
+        text = (pending + chunk).replace('* ', '- ')
+        # A trailing '*' may be the start of a bullet completed by the next chunk
+        if text.endswith('*'):
+            text, pending = text[:-1], '*'
+        else:
+            pending = ""
+        if text:
+            yield text
+    if pending:
+        yield pending
+
+def stream_model_text(model, prompt, deadline):
+    start = time.perf_counter()
+    first = True
+    usage = None
+    for chunk in model.stream(prompt, timeout=deadline.remaining()):
+        deadline.check()
+        if first:
+            stage_seconds.observe(time.perf_counter() - start, stage="model_first_chunk")
+            first = False
+        # Each chunk carries the running usage totals, so only the last one counts
+        usage = chunk.usage or usage
+        if not chunk.blocked:
+            yield chunk.text
+    stage_seconds.observe(time.perf_counter() - start, stage="model")
+    record_usage(usage)
+
+def generate_response_stream(question, use_cache=True, deadline=None, session_id=None):
+    """Yield response events: a single link/medicines/text event, or 'delta' events then 'done'.
+
+    Closing the generator (e.g. when the client disconnects) stops reading
+    the upstream stream and frees the model slot.
+    """
+    local = local_response(question)
+    if local:
+        remember(session_id, question, local)
+        yield local
+        return
     
-    if any(keyword in question_lower for keyword in medicine_keywords):
-        return "medicine"
+    history = conversations.history(session_id) if session_id else []
+    # Same cache rules as generate_response
+    use_cache = use_cache and not history
+    if use_cache:
+        cached = cached_response(question)
+        if cached is not None:
+            remember(session_id, question, cached)
+            yield cached
+            return
     
-    return None
-
-# ===== RESPONSE GENERATION =====
-def generate_response(question):
+    model = get_model()
     if not model:
-        return "Model is not initialized."
+        yield {"type": "text", "content": "Model is not initialized."}
+        return
     
-    intent = detect_intent(question)
+    deadline = deadline or Deadline(REQUEST_DEADLINE)
+    parts = []
+    with model_slots.slot(deadline):
+        try:
+            with stage_seconds.time(stage="prompt"):
+                prompt = build_prompt(question, history)
+            for text in rewrite_bullets(stream_model_text(model, prompt, deadline)):
+                parts.append(text)
+                yield {"type": "delta", "content": text}
+        except Exception as e:
+            if parts:
+                # Part of the answer is already on screen, so only flag the failure
+                errors_total.inc(kind=type(e).__name__)
+                logger.warning("Model stream failed", extra={"error": str(e)})
+                yield {"type": "error", "content": "Sorry, an error occurred."}
+            else:
+                yield fallback_response(question, e, use_cache)
+            return
     
-    if intent == "appointment":
-        return {
-            "type": "link",
-            "message": "You can book your appointment here:",
-            "url": BOOKING_URL,
-            "text": "Book Appointment Now"
-        }
+    if not parts:
+        safety_blocked_total.inc()
+        yield {"type": "text", "content": "Sorry, I couldn't generate a response."}
+        return
     
-    if intent == "medicine":
-        return {
-            "type": "link",
-            "message": "You can order your medicine here:",
-            "url": PHARMACY_URL,
-            "text": "Order Medicine Now"
-        }
-    
-    try:
-        prompt = textwrap.dedent(f"""\
-        You are a medical information assistant AI.
-        **Instructions:**
-        - Be extremely concise (2-3 sentences max)
-        - Use simple language
-        - Use lists when appropriate
-        - Include disclaimer
-        
-        **Question:**
-        {question}
+    responses_total.inc(source="model")
+    result = {"type": "text", "content": "".join(parts)}
+    if use_cache:
+        response_cache.set(question, result)
+    remember(session_id, question, result)
+    yield {"type": "done"}
 
-        **Answer:**""")
+# ===== FLASK SERVER CONFIGURATION =====
+chat_api = Blueprint('chat_api', __name__)
 
-        response = model.generate_content(prompt)
-        
-        if not response.parts:
-            return {"type": "text", "content": "Sorry, I couldn't generate a response."}
-            
-        response_text = response.text.replace('* ', '- ')
-        return {"type": "text", "content": response_text}
-        
-    except Exception as e:
-        print(f"Error: {e}")
-        return {"type": "text", "content": "Sorry, an error occurred."}
+# Session ids are chosen by the client and become memory and SQLite keys, so only
+# short, plain tokens are accepted
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_.:-]{1,128}")
 
-# ===== FLASK SERVER CONFIGURATION =====
-app = Flask(__name__)
-CORS(app)  # Enable CORS for your XAMPP frontend
+def valid_session_id(session_id):
+    return isinstance(session_id, str) and SESSION_ID_PATTERN.fullmatch(session_id) is not None
+
+def overloaded_response(e):
+    response = jsonify({'error': 'Server busy, please retry', 'reason': e.reason})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
 
-@app.route('/chat', methods=['POST'])
+@chat_api.route('/chat', methods=['POST'])
 def chat_endpoint():
+    start = time.perf_counter()
     try:
         data = request.get_json()
-        if not data or 'message' not in data:
+        if not isinstance(data, dict) or not isinstance(data.get('message'), str):
             return jsonify({'error': 'Invalid request'}), 400
         
+        session_id = data.get('session_id')
+        if session_id is not None and not valid_session_id(session_id):
+            return jsonify({'error': 'Invalid session_id'}), 400
+        
         user_message = data['message']
-        print(f"User message: {user_message}")
+        logger.debug("User message", extra={"chat_message": user_message})
         
-        response = generate_response(user_message)
-        return jsonify(response)
+        # Clients may send "cache": false to force a fresh answer
+        response = generate_response(
+            user_message,
+            use_cache=data.get('cache', True) is not False,
+            session_id=session_id
+        )
+        with stage_seconds.time(stage="serialize"):
+            return jsonify(response)
 
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
-        print(f"Server error: {e}")
+        errors_total.inc(kind="server")
+        logger.exception("Server error", extra={"error": str(e)})
         return jsonify({'error': 'Server error'}), 500
+    finally:
+        request_seconds.observe(time.perf_counter() - start, endpoint="/chat")
+
+@chat_api.route('/chat/stream', methods=['POST'])
+def chat_stream_endpoint():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('message'), str):
+        return jsonify({'error': 'Invalid request'}), 400
+    session_id = data.get('session_id')
+    if session_id is not None and not valid_session_id(session_id):
+        return jsonify({'error': 'Invalid session_id'}), 400
+    
+    user_message = data['message']
+    logger.debug("User message", extra={"chat_message": user_message})
+    use_cache = data.get('cache', True) is not False
+    
+    # Pull the first event before sending headers so admission failures become a 503
+    start = time.perf_counter()
+    stream = generate_response_stream(user_message, use_cache=use_cache, session_id=session_id)
+    try:
+        first = next(stream)
+    except Overloaded as e:
+        request_seconds.observe(time.perf_counter() - start, endpoint="/chat/stream")
+        return overloaded_response(e)
+    except Exception as e:
+        errors_total.inc(kind="server")
+        logger.exception("Server error", extra={"error": str(e)})
+        request_seconds.observe(time.perf_counter() - start, endpoint="/chat/stream")
+        return jsonify({'error': 'Server error'}), 500
+    stage_seconds.observe(time.perf_counter() - start, stage="first_event")
+    
+    # Server-Sent Events: one JSON object per "data:" line, flushed as soon as it is produced
+    def events():
+        try:
+            yield f"data: {json.dumps(first)}\n\n"
+            for event in stream:
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            stream.close()
+            request_seconds.observe(time.perf_counter() - start, endpoint="/chat/stream")
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@chat_api.route('/cache', methods=['GET'])
+def cache_stats_endpoint():
+    return jsonify(response_cache.stats())
+
+@chat_api.route('/cache', methods=['DELETE'])
+def cache_clear_endpoint():
+    # Drop a single question when one is given, otherwise everything
+    data = request.get_json(silent=True) or {}
+    if data.get('message'):
+        response_cache.invalidate(data['message'])
+    else:
+        response_cache.clear()
+    return jsonify(response_cache.stats())
+
+@chat_api.route('/chat/session', methods=['DELETE'])
+def clear_session_endpoint():
+    data = request.get_json(silent=True) or {}
+    if not valid_session_id(data.get('session_id')):
+        return jsonify({'error': 'Invalid session_id'}), 400
+    conversations.clear(data['session_id'])
+    return jsonify(conversations.stats())
+
+@chat_api.route('/load', methods=['GET'])
+def load_endpoint():
+    stats = model_slots.stats()
+    if model_resource.ready:
+        stats.update(get_model().stats())
+    return jsonify(stats)
+
+@chat_api.route('/healthz', methods=['GET'])
+def healthz_endpoint():
+    # Liveness only: the process is up and serving requests
+    return jsonify({'status': 'ok'})
+
+@chat_api.route('/readyz', methods=['GET'])
+def readyz_endpoint():
+    body = {
+        'model': model_resource.ready,
+        'warmed': model_warmed.is_set(),
+        'ready_seconds': startup['ready_seconds'],
+    }
+    if model_resource.error:
+        body['error'] = model_resource.error
+    if not model_warmed.is_set():
+        # Covers PREWARM=off and retries a failed warm-up; the probe itself never blocks
+        start_warm_up()
+        return jsonify(dict(body, status='starting')), 503
+    return jsonify(dict(body, status='ready'))
+
+@chat_api.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def create_app(prewarm=None):
+    """App factory for multi-worker servers, e.g.
+
+        gunicorn -w 4 -k gthread --threads 28 -b 0.0.0.0:5000 'training:create_app()'
+
+    MAX_IN_FLIGHT and MAX_QUEUE apply per worker process. Give each worker at
+    least MAX_IN_FLIGHT + MAX_QUEUE + 4 threads (28 with the defaults) so
+    overload reaches the limiter and is rejected with 503 instead of
+    queueing inside the server.
+
+    Conversation history lives in each worker's memory. With several workers,
+    set CONVERSATION_DB so they all read and write the same SQLite file;
+    otherwise run one worker per port behind a load balancer with sticky
+    sessions.
+
+    PREWARM controls warm_up(): "background" (default) starts it on a thread
+    so /healthz answers at once while /readyz waits, "block" finishes it
+    before returning, "off" leaves initialization to the first request or the
+    first /readyz probe, whichever comes first.
+    """
+    app = Flask(__name__)
+    CORS(app)  # Enable CORS for your XAMPP frontend
+    app.register_blueprint(chat_api)
+    
+    prewarm = prewarm or os.getenv("PREWARM", "background")
+    if prewarm == "block":
+        warm_up()
+    elif prewarm == "background":
+        start_warm_up()
+    return app
 
 # ===== XAMPP-SPECIFIC SETTINGS =====
 if __name__ == "__main__":
@@ -159,6 +591,20 @@ if __name__ == "__main__":
     print(f"• Booking Page: {BOOKING_URL}")
     print(f"• Pharmacy Page: {PHARMACY_URL}")
     
+    app = create_app()
+    
     # Run on a different port than XAMPP (Apache typically uses 80)
     # Access this API from your XAMPP PHP files at http://localhost:5000/chat
-    app.run(host='localhost', port=5000, debug=True)
\ No newline at end of file
+    if os.getenv("CHATBOT_DEBUG") == "1":
+        app.run(host='localhost', port=5000, debug=True)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("⚠️ waitress not installed, falling back to the threaded Flask server")
+            app.run(host='localhost', port=5000, threaded=True)
+        else:
+            threads = server_threads(model_slots)
+            # Cap open connections near the thread count so overload is refused at
+            # admission instead of piling up in waitress's task queue
+            serve(app, host='localhost', port=5000, threads=threads, connection_limit=threads * 2)
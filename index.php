@@ -684,6 +684,13 @@ $page_title = "Medicare - Home";
                 chatbotWindow.style.display = 'none';
             });
 
+            // Conversation id so the server can keep earlier turns for follow-up questions
+            let chatSessionId = sessionStorage.getItem('chatbotSessionId');
+            if (!chatSessionId) {
+                chatSessionId = Date.now().toString(36) + Math.random().toString(36).slice(2);
+                sessionStorage.setItem('chatbotSessionId', chatSessionId);
+            }
+
             // Handle form submission
             chatbotForm.addEventListener('submit', async (e) => {
                 e.preventDefault();
@@ -703,32 +710,65 @@ $page_title = "Medicare - Home";
                     // Show typing indicator
                     const typingIndicator = addMessage("...", 'bot', true);
 
-                    // Call Flask API (running on port 5000)
-                    const response = await fetch('http://localhost:5000/chat', {
+                    // Call Flask streaming API (running on port 5000)
+                    const response = await fetch('http://localhost:5000/chat/stream', {
                         method: 'POST',
                         headers: {
                             'Content-Type': 'application/json',
                         },
-                        body: JSON.stringify({ message: userMessage })
+                        body: JSON.stringify({ message: userMessage, session_id: chatSessionId })
                     });
 
-                    // Remove typing indicator
-                    if (typingIndicator) {
-                        typingIndicator.remove();
-                    }
-
                     if (!response.ok) {
+                        if (typingIndicator) {
+                            typingIndicator.remove();
+                        }
                         throw new Error(`HTTP error! status: ${response.status}`);
                     }
 
-                    const data = await response.json();
+                    // Read Server-Sent Events as they arrive and grow a single bot message
+                    const reader = response.body.getReader();
+                    const decoder = new TextDecoder();
+                    let buffer = '';
+                    let streamed = '';
+                    let streamDiv = null;
+
+                    const handleEvent = (data) => {
+                        if (typingIndicator && typingIndicator.isConnected) {
+                            typingIndicator.remove();
+                        }
+                        if (data.type === 'link') {
+                            const linkMessage = `${data.message} <a href="${data.url}" class="chat-link-btn" target="_blank">${data.text}</a>`;
+                            addMessage(linkMessage, 'bot');
+                        } else if (data.type === 'medicines') {
+                            addMessage(medicinesMessage(data), 'bot');
+                        } else if (data.type === 'delta') {
+                            streamed += data.content;
+                            if (!streamDiv) {
+                                streamDiv = addMessage('', 'bot', false, true);
+                            }
+                            streamDiv.innerHTML = streamed;
+                            scrollToBottom();
+                        } else if (data.type === 'text' || data.type === 'error') {
+                            addMessage(data.content, 'bot');
+                        }
+                    };
+
+                    while (true) {
+                        const { value, done } = await reader.read();
+                        if (done) break;
+                        buffer += decoder.decode(value, { stream: true });
+                        const events = buffer.split('\n\n');
+                        buffer = events.pop();
+                        for (const event of events) {
+                            if (event.startsWith('data: ')) {
+                                handleEvent(JSON.parse(event.slice(6)));
+                            }
+                        }
+                    }
 
-                    // Handle different response types
-                    if (data.type === 'link') {
-                        const linkMessage = `${data.message} <a href="${data.url}" class="chat-link-btn" target="_blank">${data.text}</a>`;
-                        addMessage(linkMessage, 'bot');
-                    } else {
-                        addMessage(data.content, 'bot');
+                    if (typingIndicator && typingIndicator.isConnected) {
+                        typingIndicator.remove();
                     }
                 } catch (error) {
                     console.error('Error:', error);
@@ -742,7 +782,7 @@ $page_title = "Medicare - Home";
                 }
             });
 
-            function addMessage(content, sender, isTyping = false) {
+            function addMessage(content, sender, isTyping = false, returnContent = false) {
                 const messageDiv = document.createElement('div');
                 messageDiv.className = sender === 'user' ? 'user-message' : 'bot-message';
                 if (isTyping) messageDiv.id = 'typingIndicator';
@@ -754,9 +794,19 @@ $page_title = "Medicare - Home";
                 chatbotMessages.appendChild(messageDiv);
                 scrollToBottom();
 
+                if (returnContent) return contentDiv;
                 return isTyping ? messageDiv : null;
             }
 
+            function medicinesMessage(data) {
+                const items = data.results.map(item => {
+                    const stock = item.stock > 0 ? `${item.stock} in stock` : 'Out of stock';
+                    const rx = item.requires_prescription ? ' <span class="badge bg-warning text-dark">Rx</span>' : '';
+                    return `<li><a href="${item.url}" target="_blank">${item.name}</a> - $${item.price.toFixed(2)} (${stock})${rx}</li>`;
+                }).join('');
+                return `${data.message}<ul class="mb-1 ps-3">${items}</ul><a href="${data.url}" class="chat-link-btn" target="_blank">${data.text}</a>`;
+            }
+
             function scrollToBottom() {
                 chatbotMessages.scrollTop = chatbotMessages.scrollHeight;
             }